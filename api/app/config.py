@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -11,3 +12,19 @@ class Config:
     INFLUXDB_ORG = os.getenv("INFLUXDB_ORG", "")
     INFLUXDB_TOKEN = os.getenv("INFLUXDB_TOKEN", "")
     INFLUXDB_DEFAULT_BUCKET = os.getenv("INFLUXDB_BUCKET", "zeb_modell")
+
+    # Resilience
+    # INFLUXDB_TIMEOUT_MS is the socket timeout for each read, not a deadline for the whole query.
+    # REQUEST_DEADLINE_SECONDS bounds how long a request waits for InfluxDB before answering with 503;
+    # keep it well below gunicorn's worker timeout (30 seconds by default).
+    INFLUXDB_TIMEOUT_MS = int(os.getenv("INFLUXDB_TIMEOUT_MS") or "5000")
+    REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS") or "10")
+    RESPONSE_MAX_STALE_SECONDS = float(os.getenv("RESPONSE_MAX_STALE_SECONDS") or "3600")
+    INFLUXDB_SLOW_QUERY_SECONDS = float(os.getenv("INFLUXDB_SLOW_QUERY_SECONDS") or "5")
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD") or "3")
+    CIRCUIT_BREAKER_RESET_SECONDS = float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS") or "30")
+
+    # Shared result store
+    SHARED_STORE_DIR = os.getenv("SHARED_STORE_DIR") or os.path.join(tempfile.gettempdir(), "zeb-visualization-store")
+    SHARED_STORE_MAX_BYTES = int(os.getenv("SHARED_STORE_MAX_BYTES") or str(256 * 1024 * 1024))
+    SHARED_STORE_TTL_SECONDS = float(os.getenv("SHARED_STORE_TTL_SECONDS") or "300")
@@ -16,6 +16,8 @@ from app.utils.data_processing import (
     process_measured_data,
     process_modeled_data,
 )
+from app.utils.response_cache import make_cache_key, serve_with_fallback
+from app.utils.shared_store import make_store_key, shared_result_store
 
 
 def _get_valid_resolutions():
@@ -31,13 +33,38 @@ def _get_valid_years(client, bucket, measurements, unit, every):
     return get_unique_years_from_df(data)
 
 
+def _get_processed_measured_data(client, year, resolution, bucket, measurement, unit, fields):
+    # Processed frames are shared by all workers, keyed by the query arguments
+    key = make_store_key("measured", year, resolution, bucket, measurement, unit, fields)
+    processed_data = shared_result_store.get_fresh(key, Config.SHARED_STORE_TTL_SECONDS)
+    if processed_data is None:
+        measured_data = query_measured_data(client, year, resolution, bucket, measurement, unit, fields)
+        processed_data = process_measured_data(measured_data, fields, resolution)
+        shared_result_store.set(key, processed_data)
+    return processed_data
+
+
+def _get_processed_modeled_data(client, year, resolution, bucket, measurement, unit, fields, models):
+    key = make_store_key("modeled", year, resolution, bucket, measurement, unit, fields, models)
+    processed_data = shared_result_store.get_fresh(key, Config.SHARED_STORE_TTL_SECONDS)
+    if processed_data is None:
+        modeled_data = query_modeled_data(client, year, resolution, bucket, measurement, unit, fields, models)
+        processed_data = process_modeled_data(modeled_data, fields, models, resolution)
+        shared_result_store.set(key, processed_data)
+    return processed_data
+
+
+def _make_response(body, status, headers):
+    if status == 200:
+        body = jsonify(body)
+    return body, status, headers
+
+
 api_blueprint = Blueprint("api", __name__)
 
 
 @api_blueprint.route("/energy-summary-data", methods=["GET"])
 def get_energy_summary_data():
-    client = create_influxdb_client()  # TODO: Memoize
-
     bucket = request.args.get("bucket", Config.INFLUXDB_DEFAULT_BUCKET)
     measured_data_measurement = request.args.get("measured_data_measurement")
     modeled_data_measurement = request.args.get("modeled_data_measurement")
@@ -56,54 +83,53 @@ def get_energy_summary_data():
             400,
         )
 
-    # Check if year is valid
-    valid_years = _get_valid_years(
-        client,
-        bucket,
-        [measured_data_measurement, modeled_data_measurement],
-        unit,
-        "1mo",
-    )
-    if year not in valid_years:
-        return (
-            "No data for this year.",
-            404,  # TODO: Consider changing to 204
+    def compute():
+        with create_influxdb_client() as client:  # TODO: Memoize
+            # Check if year is valid
+            valid_years = _get_valid_years(
+                client,
+                bucket,
+                [measured_data_measurement, modeled_data_measurement],
+                unit,
+                "1mo",
+            )
+            if year not in valid_years:
+                return (
+                    "No data for this year.",
+                    404,  # TODO: Consider changing to 204
+                )
+
+            processed_measured_data = _get_processed_measured_data(
+                client, year, resolution, bucket, measured_data_measurement, unit, fields
+            )
+            processed_modeled_data = _get_processed_modeled_data(
+                client,
+                year,
+                resolution,
+                bucket,
+                modeled_data_measurement,
+                unit,
+                fields,
+                models,
+            )
+
+        final_structure = create_final_combined_data_structure(
+            processed_measured_data,
+            processed_modeled_data,
+            fields,
+            models,
+            [measured_data_measurement, modeled_data_measurement],
+            unit,
+            year,
         )
+        return final_structure, 200
 
-    measured_data = query_measured_data(client, year, resolution, bucket, measured_data_measurement, unit, fields)
-    modeled_data = query_modeled_data(
-        client,
-        year,
-        resolution,
-        bucket,
-        modeled_data_measurement,
-        unit,
-        fields,
-        models,
-    )
-    client.close()
-
-    processed_measured_data = process_measured_data(measured_data, fields, resolution)
-    processed_modeled_data = process_modeled_data(modeled_data, fields, models, resolution)
-
-    final_structure = create_final_combined_data_structure(
-        processed_measured_data,
-        processed_modeled_data,
-        fields,
-        models,
-        [measured_data_measurement, modeled_data_measurement],
-        unit,
-        year,
-    )
-
-    response = jsonify(final_structure)
-    return response
+    key = make_cache_key(request.path, request.args)
+    return _make_response(*serve_with_fallback(key, compute))
 
 
 @api_blueprint.route("/energy-summary-measured-field-data", methods=["GET"])
 def get_energy_summary_measured_field_data():
-    client = create_influxdb_client()  # TODO: Memoize
-
     bucket = request.args.get("bucket", Config.INFLUXDB_DEFAULT_BUCKET)
     measurement = request.args.get("measurement")
     fields = request.args.get("fields").split(",")
@@ -119,35 +145,35 @@ def get_energy_summary_measured_field_data():
             400,
         )
 
-    # Check if year is valid
-    valid_years = _get_valid_years(client, bucket, [measurement], unit, "1mo")
-    if year not in valid_years:
-        return (
-            "No data for this year.",
-            404,  # TODO: Consider changing to 204
+    def compute():
+        with create_influxdb_client() as client:  # TODO: Memoize
+            # Check if year is valid
+            valid_years = _get_valid_years(client, bucket, [measurement], unit, "1mo")
+            if year not in valid_years:
+                return (
+                    "No data for this year.",
+                    404,  # TODO: Consider changing to 204
+                )
+
+            processed_measured_data = _get_processed_measured_data(
+                client, year, resolution, bucket, measurement, unit, fields
+            )
+
+        final_structure = create_final_measured_data_structure(
+            processed_measured_data,
+            fields,
+            measurement,
+            unit,
+            year,
         )
+        return final_structure, 200
 
-    measured_data = query_measured_data(client, year, resolution, bucket, measurement, unit, fields)
-    client.close()
-
-    processed_measured_data = process_measured_data(measured_data, fields, resolution)
-
-    final_structure = create_final_measured_data_structure(
-        processed_measured_data,
-        fields,
-        measurement,
-        unit,
-        year,
-    )
-
-    response = jsonify(final_structure)
-    return response
+    key = make_cache_key(request.path, request.args)
+    return _make_response(*serve_with_fallback(key, compute))
 
 
 @api_blueprint.route("/energy-summary-modeled-field-data", methods=["GET"])
 def get_energy_summary_modeled_field_data():
-    client = create_influxdb_client()  # TODO: Memoize
-
     bucket = request.args.get("bucket", Config.INFLUXDB_DEFAULT_BUCKET)
     measurement = request.args.get("measurement")
     fields = request.args.get("fields").split(",")
@@ -164,27 +190,29 @@ def get_energy_summary_modeled_field_data():
             400,
         )
 
-    # Check if year is valid
-    valid_years = _get_valid_years(client, bucket, [measurement], unit, "1mo")
-    if year not in valid_years:
-        return (
-            "No data for this year.",
-            404,  # TODO: Consider changing to 204
+    def compute():
+        with create_influxdb_client() as client:  # TODO: Memoize
+            # Check if year is valid
+            valid_years = _get_valid_years(client, bucket, [measurement], unit, "1mo")
+            if year not in valid_years:
+                return (
+                    "No data for this year.",
+                    404,  # TODO: Consider changing to 204
+                )
+
+            processed_modeled_data = _get_processed_modeled_data(
+                client, year, resolution, bucket, measurement, unit, fields, models
+            )
+
+        final_structure = create_final_modeled_data_structure(
+            processed_modeled_data,
+            fields,
+            models,
+            measurement,
+            unit,
+            year,
         )
+        return final_structure, 200
 
-    modeled_data = query_modeled_data(client, year, resolution, bucket, measurement, unit, fields, models)
-    client.close()
-
-    processed_modeled_data = process_modeled_data(modeled_data, fields, models, resolution)
-
-    final_structure = create_final_modeled_data_structure(
-        processed_modeled_data,
-        fields,
-        models,
-        measurement,
-        unit,
-        year,
-    )
-
-    response = jsonify(final_structure)
-    return response
+    key = make_cache_key(request.path, request.args)
+    return _make_response(*serve_with_fallback(key, compute))
@@ -0,0 +1,118 @@
+import threading
+import time
+
+from influxdb_client.rest import ApiException
+from urllib3.exceptions import HTTPError
+
+from app.config import Config
+
+
+class InfluxDBUnavailableError(Exception):
+    """Raised when InfluxDB can't be reached, times out, or the query is rejected by the circuit breaker."""
+
+
+class CircuitOpenError(InfluxDBUnavailableError):
+    """Raised when the circuit breaker is open and queries are short-circuited."""
+
+
+def _is_outage(error):
+    """Whether the error means InfluxDB is unavailable, as opposed to a bad query."""
+    if isinstance(error, ApiException):
+        return error.status is None or error.status >= 500
+    # Timeouts and connection errors
+    return isinstance(error, (HTTPError, OSError))
+
+
+class CircuitBreaker:
+    """Stop sending queries to InfluxDB after repeated slow or failed queries.
+
+    The breaker opens after `failure_threshold` consecutive failures (a query slower than
+    `slow_query_seconds` counts as a failure). Only timeouts, connection errors and 5xx responses
+    are failures; other errors, such as a 400 for an invalid Flux query, propagate unchanged.
+    While open, calls fail fast with `CircuitOpenError`. After `reset_timeout` seconds a single
+    trial call is let through; success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold, reset_timeout, slow_query_seconds, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_query_seconds = slow_query_seconds
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def retry_after(self):
+        """Seconds until the breaker lets a trial call through."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return int(self.reset_timeout)
+            return max(0, int(self._opened_at + self.reset_timeout - self._clock()) + 1)
+
+    def _before_call(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                # Let exactly one trial call through
+                self._state = self.HALF_OPEN
+                return
+            raise CircuitOpenError("InfluxDB circuit breaker is open")
+
+    def _record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def _release_trial(self):
+        # InfluxDB answered the trial call, so it is reachable again
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._failures = 0
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def call(self, func, *args, **kwargs):
+        self._before_call()
+
+        start = self._clock()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not _is_outage(e):
+                self._release_trial()
+                raise
+            self._record_failure()
+            raise InfluxDBUnavailableError(str(e)) from e
+
+        # A query that succeeds but blows the deadline still counts against the breaker
+        if self._clock() - start > self.slow_query_seconds:
+            self._record_failure()
+        else:
+            self._record_success()
+
+        return result
+
+
+influxdb_circuit_breaker = CircuitBreaker(
+    failure_threshold=Config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=Config.CIRCUIT_BREAKER_RESET_SECONDS,
+    slow_query_seconds=Config.INFLUXDB_SLOW_QUERY_SECONDS,
+)
@@ -4,6 +4,7 @@ from influxdb_client import InfluxDBClient
 from influxdb_client.client.warnings import MissingPivotFunction
 
 from app.config import Config
+from app.influxdb_operations.circuit_breaker import influxdb_circuit_breaker
 
 warnings.simplefilter("ignore", MissingPivotFunction)
 
@@ -14,9 +15,15 @@ def create_influxdb_client():
         token=Config.INFLUXDB_TOKEN,
         org=Config.INFLUXDB_ORG,
         verify_ssl=False,
+        timeout=Config.INFLUXDB_TIMEOUT_MS,
     )
 
 
+def _query_data_frame(query_api, query):
+    # Every query goes through the circuit breaker so that slow or failing queries trip it
+    return influxdb_circuit_breaker.call(query_api.query_data_frame, query)
+
+
 def get_time_parameters(resolution, year):
     default_stop = f"{year+1}-01-01T01:00:00Z"
 
@@ -49,7 +56,7 @@ def query_measured_data(client, year, resolution, bucket, measurement, unit, fie
         f'|> aggregateWindow(every: {every}, fn: first, createEmpty: false, timeSrc: "_start")'
     )
 
-    return query_api.query_data_frame(query)
+    return _query_data_frame(query_api, query)
 
 
 def query_modeled_data(client, year, resolution, bucket, measurement, unit, fields, models):
@@ -69,7 +76,7 @@ def query_modeled_data(client, year, resolution, bucket, measurement, unit, fiel
         f'|> aggregateWindow(every: {every}, fn: first, createEmpty: false, timeSrc: "_start")'
     )
 
-    return query_api.query_data_frame(query)
+    return _query_data_frame(query_api, query)
 
 
 def query_measurements(client, every, bucket, measurements, unit):
@@ -83,4 +90,4 @@ def query_measurements(client, every, bucket, measurements, unit):
         f'|> aggregateWindow(every: {every}, fn: first, createEmpty: false, timeSrc: "_start")'
     )
 
-    return query_api.query_data_frame(query)
+    return _query_data_frame(query_api, query)
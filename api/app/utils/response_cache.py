@@ -0,0 +1,95 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from app.config import Config
+from app.influxdb_operations.circuit_breaker import CircuitBreaker, InfluxDBUnavailableError, influxdb_circuit_breaker
+from app.utils.shared_store import make_store_key, shared_result_store
+
+logger = logging.getLogger(__name__)
+
+_refreshes = {}
+_refreshes_lock = threading.Lock()
+
+
+def make_cache_key(path, args):
+    """Build a cache key from the request path and its query arguments."""
+    return make_store_key("response", path, sorted(args.items()))
+
+
+def _refresh(key, compute, future):
+    try:
+        body, status = compute()
+        if status == 200:
+            shared_result_store.set(key, body)
+        future.set_result((body, status))
+    except InfluxDBUnavailableError as e:
+        logger.warning("Refresh of %s failed: %s", key, e)
+        future.set_exception(e)
+    except Exception as e:
+        # Nobody may be waiting on the future, so make sure the error is seen
+        logger.exception("Refresh of %s failed", key)
+        future.set_exception(e)
+    finally:
+        with _refreshes_lock:
+            _refreshes.pop(key, None)
+
+
+def refresh_in_background(key, compute):
+    """Start a background refresh for the key unless one is already running.
+
+    Returns a future resolving to the (body, status) tuple returned by `compute`.
+    """
+    with _refreshes_lock:
+        future = _refreshes.get(key)
+        if future is None:
+            future = Future()
+            _refreshes[key] = future
+            threading.Thread(target=_refresh, args=(key, compute, future), daemon=True).start()
+    return future
+
+
+def serve_with_fallback(key, compute):
+    """Serve a cached response, refreshing it in the background when it is stale.
+
+    Cached responses are shared by all workers through the shared result store. A cached response
+    is served as stale while a single background refresh runs if it is past its TTL, or if the
+    circuit breaker is not closed, as long as it is younger than `RESPONSE_MAX_STALE_SECONDS`.
+    Requests never query InfluxDB themselves; without a usable cached response they wait for the
+    background refresh, but no longer than `REQUEST_DEADLINE_SECONDS`. A refresh that misses the
+    deadline keeps running and fills the cache for later requests.
+
+    `compute` must not depend on the request context, since it runs in a background thread.
+    It returns a (body, status) tuple; only bodies with status 200 are cached.
+
+    Returns a (body, status, headers) tuple.
+    """
+    cached = shared_result_store.get(key)
+    if cached is not None:
+        body, stored_at = cached
+        age = time.time() - stored_at
+        if age < Config.SHARED_STORE_TTL_SECONDS and influxdb_circuit_breaker.state == CircuitBreaker.CLOSED:
+            return body, 200, {"X-Cache-Status": "HIT"}
+
+        # Past the maximum staleness, a refresh that keeps failing surfaces its error instead
+        if age < Config.RESPONSE_MAX_STALE_SECONDS:
+            refresh_in_background(key, compute)
+
+            headers = {
+                "X-Cache-Status": "STALE",
+                "Age": str(int(age)),
+                "Warning": '110 - "Response is Stale"',
+            }
+            return body, 200, headers
+
+    try:
+        body, status = refresh_in_background(key, compute).result(timeout=Config.REQUEST_DEADLINE_SECONDS)
+    except (InfluxDBUnavailableError, TimeoutError):
+        return (
+            "InfluxDB is unavailable.",
+            503,
+            {"Retry-After": str(influxdb_circuit_breaker.retry_after())},
+        )
+
+    return body, status, {}
@@ -0,0 +1,230 @@
+import logging
+import mmap
+import os
+import pickle
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of stored values changes. Pickled frames also depend on the pandas version,
+# so entries written by other versions are never looked up and age out of the store.
+STORE_FORMAT_VERSION = 1
+_KEY_PREFIX = f"v{STORE_FORMAT_VERSION}-pandas{pd.__version__}"
+
+ORPHAN_MAX_AGE_SECONDS = 5 * 60
+
+
+class SharedResultStore:
+    """On-disk result store shared by all worker processes on a host.
+
+    Values are pickled into a file and read back through a memory map. A SQLite index maps each
+    key to its file and tracks size and last access, so the store can be kept under a byte budget
+    by evicting the least recently used entries. To keep cache hits cheap, last access is only
+    updated once it is older than `touch_interval` seconds. Every write goes to a new, uniquely
+    named file that is only added to the index once it is complete, so readers never see a
+    partially written value.
+    """
+
+    def __init__(self, directory, max_bytes, touch_interval):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._check_directory()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, filename TEXT NOT NULL, size INTEGER NOT NULL, "
+                "stored_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            self._sweep_orphans(connection)
+
+    def _check_directory(self):
+        # Values are unpickled, so anyone who can write to the directory can run code in this process
+        st = os.lstat(self.directory)
+        if not stat.S_ISDIR(st.st_mode):
+            raise PermissionError(f"Shared store path {self.directory} is not a directory")
+        if not hasattr(os, "getuid"):
+            # Ownership and mode bits don't map to Windows ACLs
+            return
+        if st.st_uid != os.getuid():
+            raise PermissionError(f"Shared store directory {self.directory} is not owned by the current user")
+        if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError(f"Shared store directory {self.directory} is writable by other users")
+
+    def _sweep_orphans(self, connection):
+        """Remove files that never made it into the index, e.g. because a worker died mid-write.
+
+        Only files older than `ORPHAN_MAX_AGE_SECONDS` are removed, so writes in progress in other
+        workers are left alone.
+        """
+        indexed = {filename for (filename,) in connection.execute("SELECT filename FROM entries")}
+        cutoff = time.time() - ORPHAN_MAX_AGE_SECONDS
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".pickle") or entry.name in indexed:
+                continue
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    self._unlink(entry.name)
+            except OSError:
+                pass
+
+    def _connect(self):
+        # Wait for the write lock well within the request deadline; failures are treated as cache misses
+        connection = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=2)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # The store is a cache, so losing the last commits on power loss is fine
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _connection(self):
+        # SQLite connections can't be shared across threads or forked processes
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.connection = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def _path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def get(self, key):
+        """Return (value, stored_at) for the key, or None.
+
+        Store errors, such as a locked index, are logged and treated as a miss.
+        """
+        try:
+            return self._get(key)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Shared store lookup of %s failed: %s", key, e)
+            return None
+
+    def _get(self, key):
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT filename, stored_at, last_access FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        filename, stored_at, last_access = row
+        try:
+            with open(self._path(filename), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                value = pickle.loads(mm)
+        except FileNotFoundError:
+            # Evicted or replaced by another worker in the meantime
+            return None
+        except Exception:
+            # Written by an incompatible version of the code or its dependencies
+            self._delete(key, filename)
+            return None
+
+        now = time.time()
+        if now - last_access > self.touch_interval:
+            with connection:
+                connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+
+        return value, stored_at
+
+    def _delete(self, key, filename):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM entries WHERE key = ? AND filename = ?", (key, filename))
+        self._unlink(filename)
+
+    def _unlink(self, filename):
+        try:
+            os.unlink(self._path(filename))
+        except OSError:
+            # Already gone, or still memory-mapped by another worker on Windows
+            pass
+
+    def get_fresh(self, key, max_age):
+        """Return the value for the key if it was stored less than `max_age` seconds ago, or None."""
+        entry = self.get(key)
+        if entry is None or time.time() - entry[1] >= max_age:
+            return None
+        return entry[0]
+
+    def set(self, key, value):
+        """Store the value for the key. Store errors, such as a full disk, are logged and the write is skipped."""
+        try:
+            self._set(key, value)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Shared store write of %s failed: %s", key, e)
+
+    def _set(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=".pickle")
+        filename = os.path.basename(path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        except BaseException:
+            self._unlink(filename)
+            raise
+
+        now = time.time()
+        connection = self._connection()
+        try:
+            self._insert(connection, key, filename, len(data), now)
+        except BaseException:
+            self._unlink(filename)
+            raise
+
+    def _insert(self, connection, key, filename, size, now):
+        with connection:
+            # Take the write lock up front so the replaced row can't change before it is overwritten
+            connection.execute("BEGIN IMMEDIATE")
+            old_row = connection.execute("SELECT filename FROM entries WHERE key = ?", (key,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, filename, size, stored_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, filename, size, now, now),
+            )
+            self._evict(connection)
+
+        if old_row is not None:
+            self._unlink(old_row[0])
+
+    def _evict(self, connection):
+        """Remove least recently used entries until the store is within its byte budget."""
+        (total,) = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, filename, size in connection.execute(
+            "SELECT key, filename, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((key, filename))
+            total -= size
+
+        connection.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+        for _, filename in evicted:
+            self._unlink(filename)
+
+
+def make_store_key(namespace, *args):
+    """Build a store key from a namespace and the arguments a result was computed from."""
+    return f"{_KEY_PREFIX}:{namespace}:{args!r}"
+
+
+shared_result_store = SharedResultStore(
+    Config.SHARED_STORE_DIR,
+    Config.SHARED_STORE_MAX_BYTES,
+    touch_interval=Config.SHARED_STORE_TTL_SECONDS / 10,
+)
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# The shared result store is created on import, so point it somewhere disposable first
+os.environ.setdefault("SHARED_STORE_DIR", tempfile.mkdtemp(prefix="zeb-visualization-test-store-"))
@@ -0,0 +1,115 @@
+import pytest
+from influxdb_client.rest import ApiException
+
+from app.influxdb_operations.circuit_breaker import CircuitBreaker, CircuitOpenError, InfluxDBUnavailableError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def fail():
+    raise OSError("connection refused")
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=2, reset_timeout=30, slow_query_seconds=5, clock=clock)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(InfluxDBUnavailableError):
+            breaker.call(fail)
+
+
+def test_opens_after_failure_threshold(breaker):
+    with pytest.raises(InfluxDBUnavailableError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    with pytest.raises(InfluxDBUnavailableError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "result")
+
+
+def test_retry_after(breaker, clock):
+    assert breaker.retry_after() == 30
+
+    trip(breaker)
+    clock.advance(10)
+    assert breaker.retry_after() == 21
+
+
+def test_allows_single_trial_after_reset_timeout(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    def trial():
+        # A second call while the trial is in flight is short-circuited
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "other")
+        return "result"
+
+    assert breaker.call(trial) == "result"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_reopens(breaker, clock):
+    trip(breaker)
+    clock.advance(30)
+
+    with pytest.raises(InfluxDBUnavailableError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "result")
+
+
+def test_slow_success_counts_as_failure(breaker, clock):
+    def slow():
+        clock.advance(10)
+        return "result"
+
+    assert breaker.call(slow) == "result"
+    assert breaker.call(slow) == "result"
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.parametrize("error", [ApiException(status=400), ValueError("bad flux")])
+def test_client_errors_do_not_trip(breaker, error):
+    def bad_query():
+        raise error
+
+    for _ in range(breaker.failure_threshold + 1):
+        with pytest.raises(type(error)) as excinfo:
+            breaker.call(bad_query)
+        assert excinfo.value is error
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_server_errors_trip(breaker):
+    def server_error():
+        raise ApiException(status=503)
+
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(InfluxDBUnavailableError):
+            breaker.call(server_error)
+    assert breaker.state == CircuitBreaker.OPEN
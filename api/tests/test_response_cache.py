@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from app.config import Config
+from app.influxdb_operations.circuit_breaker import CircuitBreaker, InfluxDBUnavailableError
+from app.utils import response_cache
+from app.utils.shared_store import SharedResultStore
+
+KEY = "response:test"
+
+
+def fail():
+    raise OSError("connection refused")
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SharedResultStore(str(tmp_path / "store"), max_bytes=1024 * 1024, touch_interval=1)
+    monkeypatch.setattr(response_cache, "shared_result_store", store)
+    return store
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, slow_query_seconds=5)
+    monkeypatch.setattr(response_cache, "influxdb_circuit_breaker", breaker)
+    return breaker
+
+
+class Compute:
+    """Stand-in for an endpoint's compute function that records its calls."""
+
+    def __init__(self, body):
+        self.body = body
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        return self.body, 200
+
+
+def test_fresh_response_is_a_hit(store, breaker):
+    store.set(KEY, {"data": "cached"})
+    compute = Compute({"data": "fresh"})
+
+    body, status, headers = response_cache.serve_with_fallback(KEY, compute)
+
+    assert (body, status) == ({"data": "cached"}, 200)
+    assert headers == {"X-Cache-Status": "HIT"}
+    assert compute.calls == 0
+
+
+def test_expired_response_is_served_stale_and_refreshed(store, breaker, monkeypatch):
+    monkeypatch.setattr(Config, "SHARED_STORE_TTL_SECONDS", 0)
+    store.set(KEY, {"data": "cached"})
+    compute = Compute({"data": "fresh"})
+
+    body, status, headers = response_cache.serve_with_fallback(KEY, compute)
+
+    assert (body, status) == ({"data": "cached"}, 200)
+    assert headers["X-Cache-Status"] == "STALE"
+    assert "Warning" in headers
+
+    assert wait_for(lambda: store.get(KEY)[0] == {"data": "fresh"})
+    assert compute.calls == 1
+
+
+def test_response_is_served_stale_while_breaker_is_open(store, breaker):
+    store.set(KEY, {"data": "cached"})
+    with pytest.raises(InfluxDBUnavailableError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    body, status, headers = response_cache.serve_with_fallback(KEY, Compute({"data": "fresh"}))
+
+    assert (body, status) == ({"data": "cached"}, 200)
+    assert headers["X-Cache-Status"] == "STALE"
+
+
+def test_cold_miss_waits_for_refresh(store, breaker):
+    compute = Compute({"data": "fresh"})
+
+    body, status, headers = response_cache.serve_with_fallback(KEY, compute)
+
+    assert (body, status, headers) == ({"data": "fresh"}, 200, {})
+    assert store.get(KEY)[0] == {"data": "fresh"}
+
+
+def test_cold_miss_while_influxdb_is_unavailable_is_503(store, breaker):
+    def compute():
+        return breaker.call(fail)
+
+    body, status, headers = response_cache.serve_with_fallback(KEY, compute)
+
+    assert status == 503
+    assert headers["Retry-After"] == "30"